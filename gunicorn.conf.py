@@ -0,0 +1,14 @@
+"""
+Gunicorn configuration for the Order Service
+Runs order_service:app on UvicornWorker processes sized to 2 * cores + 1
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = "order_service:app"
+bind = os.getenv("ORDER_SERVICE_BIND", "0.0.0.0:8001")
+
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+keepalive = 5
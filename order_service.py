@@ -3,17 +3,111 @@ Order Service - FastAPI Application
 Handles order processing and management
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple, Union
+from contextlib import asynccontextmanager
+import anyio
+import asyncpg
+import atexit
+import hashlib
+import httpx
+import json
 import logging
+import numpy as np
+import os
+import queue
+import redis.asyncio as aioredis
+import uuid
+from contextvars import ContextVar
 from datetime import datetime
+from ulid import ULID
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from pythonjsonlogger import jsonlogger
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients before serving and close them on shutdown"""
+    configure_logging()
+    logger.info("Order Service starting up")
+    # Threadpool used by sync offloads and sync endpoints (default is 40 tokens)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 100
+    # Pool is ready before the first request instead of being created lazily
+    app.state.pool = await asyncpg.create_pool(
+        DATABASE_URL,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_SIZE + DB_MAX_OVERFLOW,
+        max_inactive_connection_lifetime=DB_POOL_MAX_IDLE,
+        command_timeout=60,
+        init=_init_connection
+    )
+    app.state.redis = aioredis.from_url(REDIS_URL, decode_responses=True)
+    yield
+    # NO SHUTDOWN LOGGING - GAP!
+    await app.state.pool.close()
+    await app.state.redis.aclose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost/orders")
+# Per worker process: the server sees up to workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections
+# Connections opened at startup; the rest are opened on demand, like SQLAlchemy's pool_size
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+# Idle connections above min_size are closed after this many seconds
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 300))
+# Helpers accept the pool (autocommit per statement) or a connection inside a transaction
+DBExecutor = Union[asyncpg.Pool, asyncpg.Connection]
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+ORDER_CACHE_TTL = 300
+# Consumed by shipping_worker.py, which performs the actual shipping-service call
+SHIPPING_STREAM = "shipping_notifications"
+# Below this many line items the NumPy array setup costs more than the Python loop
+VECTORIZED_TOTAL_MIN_ITEMS = 64
+SHIPPING_SERVICE_URL = os.getenv("SHIPPING_SERVICE_URL", "http://shipping-service:8002/api/shipments/notify")
 
 # Logging configured
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+
+# Shipped to the central log store by a sidecar (Fluent Bit / Vector) tailing this file
+LOG_FILE = os.getenv("ORDER_SERVICE_LOG_FILE", "/var/log/order_service/app.log")
+
+# Correlation ID for the request currently being handled
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request's correlation ID"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+def configure_logging(level=logging.INFO):
+    """Enqueue records on the request path; a listener thread formats and writes them
+
+    Called once per process at startup, not on import. Every worker appends to the same
+    file, so rotation is left to logrotate - WatchedFileHandler reopens the file after a rename.
+    """
+    handler = WatchedFileHandler(LOG_FILE)
+    handler.setFormatter(jsonlogger.JsonFormatter("%(asctime)s %(levelname)s %(name)s %(request_id)s %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    root = logging.getLogger()
+    root.setLevel(level)
+    # Filter on the enqueueing side - the listener thread can't see the request's context
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(queue_handler)
+    listener.start()
+    atexit.register(listener.stop)
 
 
 class OrderItem(BaseModel):
@@ -37,175 +131,342 @@ class Order(BaseModel):
     created_at: datetime
 
 
+async def get_pool(request: Request) -> asyncpg.Pool:
+    """Connection pool created once in lifespan"""
+    return request.app.state.pool
+
+
+async def get_redis(request: Request) -> aioredis.Redis:
+    """Redis client created once in lifespan"""
+    return request.app.state.redis
+
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Bind X-Request-ID (or a new UUID) to every log record emitted for this request"""
+    request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        request_id_var.reset(token)
+
+
 @app.post("/api/orders")
-async def create_order(order_request: CreateOrderRequest):
+async def create_order(order_request: CreateOrderRequest, pool: asyncpg.Pool = Depends(get_pool),
+                       redis: aioredis.Redis = Depends(get_redis)):
     """Create a new order - MISSING DATABASE LOGGING"""
     # Entry point has logging
-    logger.info(f"Creating order for user: {order_request.user_id}")
+    logger.info("Creating order for user: %s", order_request.user_id)
     
     try:
         # Calculate total
-        total = sum(item.quantity * item.price for item in order_request.items)
-        
-        # Database transaction START - NO LOGGING! MAJOR GAP!
-        order_id = f"order_{hash(order_request.user_id)}"
-        
-        # Insert order into database (no logging)
-        save_order_to_db(order_id, order_request.user_id, order_request.items, total)
+        total = order_total(order_request.items)
         
-        # Update inventory (no logging) - CRITICAL GAP!
-        for item in order_request.items:
-            update_inventory(item.product_id, -item.quantity)
+        # ULIDs are unique and time-ordered, so inserts land on the right-most index page
+        order_id = f"order_{ULID()}"
         
-        # Create payment record (no logging) - GAP!
-        create_payment_record(order_id, total)
+        # Database transaction START - NO LOGGING! MAJOR GAP!
+        async with pool.acquire() as con, con.transaction():
+            # Insert order into database (no logging)
+            created_at = await save_order_to_db(con, order_id, order_request.user_id, order_request.items, total)
+            
+            # Update inventory (no logging) - CRITICAL GAP!
+            await update_inventory(con, [(item.product_id, -item.quantity) for item in order_request.items])
+            
+            # Create payment record (no logging) - GAP!
+            await create_payment_record(con, order_id, total)
         
         # Database transaction END - NO COMMIT LOGGING! GAP!
         
-        logger.info(f"Order created successfully: {order_id}")
-        
-        return {
-            "order_id": order_id,
-            "total_amount": total,
-            "status": "pending"
-        }
-        
     except Exception as e:
         # Error logging present
-        logger.error(f"Failed to create order: {str(e)}", exc_info=True)
+        logger.error("Failed to create order: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Order creation failed")
+    
+    # The order is committed - a cache failure must not turn it into a 500 (and a duplicate on retry)
+    order = Order(
+        order_id=order_id,
+        user_id=order_request.user_id,
+        items=order_request.items,
+        total_amount=total,
+        status="pending",
+        created_at=created_at
+    )
+    try:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.set(f"order:{order_id}", order.model_dump_json(), ex=ORDER_CACHE_TTL)
+            pipe.zadd(f"orders:user:{order_request.user_id}", {order_id: created_at.timestamp()})
+            await pipe.execute()
+    except aioredis.RedisError as e:
+        # Reads rebuild the cache on a miss
+        logger.warning("Could not cache new order %s: %s", order_id, e)
+    
+    logger.info("Order created successfully: %s", order_id)
+    
+    return ORJSONResponse({
+        "order_id": order_id,
+        "total_amount": total,
+        "status": "pending"
+    })
+
+
+def conditional_json(request: Request, body) -> Response:
+    """Serve a serialized JSON body with an ETag, or 304 if the client already has it"""
+    if isinstance(body, str):
+        body = body.encode()
+    etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=30"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.get("/api/orders/{order_id}")
-async def get_order(order_id: str):
+async def get_order(order_id: str, request: Request, pool: asyncpg.Pool = Depends(get_pool),
+                    redis: aioredis.Redis = Depends(get_redis)):
     """Get order details - NO LOGGING AT ALL"""
     # NO ENTRY LOGGING - GAP!
+    cached = await redis.get(f"order:{order_id}")
+    if cached:
+        # Already serialized - skip decode/re-encode
+        return conditional_json(request, cached)
+    
     # NO DATABASE QUERY LOGGING - GAP!
-    order = fetch_order_from_db(order_id)
+    order = await fetch_order_from_db(pool, order_id)
     
     if not order:
         # NO ERROR LOGGING - GAP!
         raise HTTPException(status_code=404, detail="Order not found")
     
+    body = order.model_dump_json()
+    await redis.set(f"order:{order_id}", body, ex=ORDER_CACHE_TTL)
+    
     # NO SUCCESS LOGGING - GAP!
-    return order
+    return conditional_json(request, body)
 
 
 @app.put("/api/orders/{order_id}/status")
-async def update_order_status(order_id: str, status: str):
+async def update_order_status(order_id: str, status: str, pool: asyncpg.Pool = Depends(get_pool),
+                              redis: aioredis.Redis = Depends(get_redis)):
     """Update order status - PARTIAL LOGGING"""
-    logger.info(f"Updating order status: {order_id} -> {status}")
+    logger.info("Updating order status: %s -> %s", order_id, status)
     
     try:
         # Database update with NO LOGGING - GAP!
-        result = update_order_status_in_db(order_id, status)
+        result = await update_order_status_in_db(pool, order_id, status)
         
         if not result:
             # Has error logging
-            logger.warning(f"Order not found for status update: {order_id}")
+            logger.warning("Order not found for status update: %s", order_id)
             raise HTTPException(status_code=404, detail="Order not found")
         
+        await redis.delete(f"order:{order_id}")
+        
         # Status change notification (no logging) - GAP!
         if status == "shipped":
-            notify_shipping_service(order_id)
+            await redis.xadd(SHIPPING_STREAM, {"order_id": order_id})
         
         # Success logged
-        logger.info(f"Order status updated: {order_id}")
-        return {"message": "Status updated", "order_id": order_id}
+        logger.info("Order status updated: %s", order_id)
+        return ORJSONResponse({"message": "Status updated", "order_id": order_id})
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Status update failed: {str(e)}")
+        logger.error("Status update failed: %s", e)
         raise HTTPException(status_code=500, detail="Update failed")
 
 
 @app.delete("/api/orders/{order_id}")
-async def cancel_order(order_id: str):
+async def cancel_order(order_id: str, pool: asyncpg.Pool = Depends(get_pool),
+                       redis: aioredis.Redis = Depends(get_redis)):
     """Cancel order - MISSING CRITICAL LOGGING"""
     # NO ENTRY LOGGING - GAP!
     
     try:
-        order = fetch_order_from_db(order_id)
+        order = await fetch_order_from_db(pool, order_id)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
         # CRITICAL: Refund processing with NO LOGGING - MAJOR GAP!
-        process_refund(order_id, order["total_amount"])
+        # Still synchronous - run it off the event loop
+        await anyio.to_thread.run_sync(process_refund, order_id, order.total_amount)
         
         # CRITICAL: Inventory restoration with NO LOGGING - MAJOR GAP!
-        for item in order["items"]:
-            restore_inventory(item["product_id"], item["quantity"])
+        await restore_inventory(pool, [(item.product_id, item.quantity) for item in order.items])
         
         # Delete order (no logging) - GAP!
-        delete_order_from_db(order_id)
+        await delete_order_from_db(pool, order_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(f"order:{order_id}")
+            pipe.zrem(f"orders:user:{order.user_id}", order_id)
+            await pipe.execute()
         
         # NO SUCCESS LOGGING - GAP!
-        return {"message": "Order cancelled"}
+        return ORJSONResponse({"message": "Order cancelled"})
         
     except HTTPException:
         raise
     except Exception as e:
         # Has error logging
-        logger.error(f"Order cancellation failed: {str(e)}")
+        logger.error("Order cancellation failed: %s", e)
         raise HTTPException(status_code=500, detail="Cancellation failed")
 
 
 @app.get("/api/orders/user/{user_id}")
-async def get_user_orders(user_id: str, limit: Optional[int] = 10):
+async def get_user_orders(user_id: str, request: Request, limit: Optional[int] = 10, pool: asyncpg.Pool = Depends(get_pool),
+                          redis: aioredis.Redis = Depends(get_redis)):
     """Get user's orders - NO LOGGING"""
     # NO LOGGING ANYWHERE - GAP!
-    orders = fetch_user_orders_from_db(user_id, limit)
-    return {"orders": orders, "count": len(orders)}
-
-
-def save_order_to_db(order_id: str, user_id: str, items: List[OrderItem], total: float):
-    """Save order to database - NO LOGGING"""
+    index_key = f"orders:user:{user_id}"
+    # Set when the index is known to hold every order the user has
+    complete_key = f"{index_key}:complete"
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.zrevrange(index_key, 0, limit - 1)
+        pipe.exists(complete_key)
+        order_ids, complete = await pipe.execute()
+    if len(order_ids) == limit or complete:
+        cached = []
+        if order_ids:
+            async with redis.pipeline(transaction=False) as pipe:
+                for cached_id in order_ids:
+                    pipe.get(f"order:{cached_id}")
+                cached = await pipe.execute()
+        if all(cached):
+            # Stitch the cached order payloads together without decoding them
+            return conditional_json(request, orders_body(cached))
+    
+    # Index or order payloads incomplete - read from the DB and backfill both
+    orders = await fetch_user_orders_from_db(pool, user_id, limit)
+    bodies = [order.model_dump_json() for order in orders]
+    async with redis.pipeline(transaction=False) as pipe:
+        for order, body in zip(orders, bodies):
+            pipe.set(f"order:{order.order_id}", body, ex=ORDER_CACHE_TTL)
+        if orders:
+            pipe.zadd(index_key, {order.order_id: order.created_at.timestamp() for order in orders})
+        if len(orders) < limit:
+            # Fewer rows than requested means these are all of the user's orders
+            pipe.set(complete_key, 1, ex=ORDER_CACHE_TTL)
+        await pipe.execute()
+    return conditional_json(request, orders_body(bodies))
+
+
+def orders_body(bodies: List[str]) -> str:
+    """Order list response built from orders already serialized with model_dump_json"""
+    return '{"orders":[%s],"count":%d}' % (",".join(bodies), len(bodies))
+
+
+def order_total(items: List[OrderItem]) -> float:
+    """Sum quantity * price, vectorized for large (B2B) baskets"""
+    if len(items) < VECTORIZED_TOTAL_MIN_ITEMS:
+        return sum(item.quantity * item.price for item in items)
+    quantities = np.fromiter((item.quantity for item in items), dtype=np.int64, count=len(items))
+    prices = np.fromiter((item.price for item in items), dtype=np.float64, count=len(items))
+    return float(quantities @ prices)
+
+
+async def save_order_to_db(db: DBExecutor, order_id: str, user_id: str, items: List[OrderItem], total: float):
+    """Save order to database, returning its created_at - NO LOGGING"""
     # CRITICAL DATABASE WRITE WITH NO LOGGING - MAJOR GAP!
-    pass
+    return await db.fetchval(
+        "INSERT INTO orders (order_id, user_id, items, total_amount, status) "
+        "VALUES ($1, $2, $3, $4, 'pending') RETURNING created_at",
+        order_id, user_id, [item.model_dump() for item in items], total
+    )
 
 
-def fetch_order_from_db(order_id: str):
+async def fetch_order_from_db(db: DBExecutor, order_id: str) -> Optional[Order]:
     """Fetch order from database - NO LOGGING"""
     # Database read with no logging - GAP!
-    return {
-        "order_id": order_id,
-        "user_id": "user_123",
-        "items": [],
-        "total_amount": 99.99,
-        "status": "pending"
-    }
-
-
-def update_order_status_in_db(order_id: str, status: str):
+    row = await db.fetchrow(
+        "SELECT order_id, user_id, items, total_amount, status, created_at FROM orders WHERE order_id = $1",
+        order_id
+    )
+    if not row:
+        return None
+    return order_from_row(row)
+
+
+def order_from_row(row) -> Order:
+    """Build an Order from a DB row without re-validation
+
+    Rows written by this service are already valid. Numbers are coerced to the model's
+    types so model_dump_json - the only serializer used for cached orders - gives the
+    same bytes as for a validated Order.
+    """
+    return Order.model_construct(
+        order_id=row["order_id"],
+        user_id=row["user_id"],
+        items=[
+            OrderItem.model_construct(
+                product_id=item["product_id"],
+                quantity=int(item["quantity"]),
+                price=float(item["price"])
+            )
+            for item in row["items"]
+        ],
+        total_amount=float(row["total_amount"]),
+        status=row["status"],
+        created_at=row["created_at"]
+    )
+
+
+async def update_order_status_in_db(db: DBExecutor, order_id: str, status: str):
     """Update order status in database - NO LOGGING"""
     # Database update with no logging - GAP!
-    return True
+    result = await db.execute(
+        "UPDATE orders SET status = $2 WHERE order_id = $1", order_id, status
+    )
+    return result != "UPDATE 0"
 
 
-def delete_order_from_db(order_id: str):
+async def delete_order_from_db(db: DBExecutor, order_id: str):
     """Delete order from database - NO LOGGING"""
     # CRITICAL: Data deletion with no audit trail - MAJOR GAP!
-    pass
+    await db.execute("DELETE FROM orders WHERE order_id = $1", order_id)
+
+
+INVENTORY_BULK_UPDATE = (
+    "UPDATE inventory SET quantity = inventory.quantity + data.delta "
+    "FROM UNNEST($1::text[], $2::int[]) AS data(product_id, delta) "
+    "WHERE inventory.product_id = data.product_id"
+)
 
 
-def update_inventory(product_id: str, quantity_delta: int):
-    """Update inventory - CRITICAL MISSING LOGGING"""
+def net_inventory_deltas(deltas: List[Tuple[str, int]]) -> Tuple[List[str], List[int]]:
+    """Sum deltas per product - UPDATE ... FROM applies only one joined row to each inventory row"""
+    totals = {}
+    for product_id, delta in deltas:
+        totals[product_id] = totals.get(product_id, 0) + delta
+    return list(totals), list(totals.values())
+
+
+async def update_inventory(db: DBExecutor, deltas: List[Tuple[str, int]]):
+    """Update inventory for all (product_id, delta) pairs in one statement - CRITICAL MISSING LOGGING"""
     # CRITICAL: Inventory changes with NO LOGGING - MAJOR GAP!
     # This is a critical business operation that MUST be logged
-    pass
+    if not deltas:
+        return
+    product_ids, quantities = net_inventory_deltas(deltas)
+    await db.execute(INVENTORY_BULK_UPDATE, product_ids, quantities)
 
 
-def restore_inventory(product_id: str, quantity: int):
+async def restore_inventory(db: DBExecutor, items: List[Tuple[str, int]]):
     """Restore inventory after cancellation - NO LOGGING"""
     # CRITICAL: Inventory restoration with NO LOGGING - MAJOR GAP!
-    pass
+    await update_inventory(db, items)
 
 
-def create_payment_record(order_id: str, amount: float):
+async def create_payment_record(db: DBExecutor, order_id: str, amount: float):
     """Create payment record - NO LOGGING"""
     # Financial transaction with NO LOGGING - SECURITY GAP!
-    pass
+    await db.execute(
+        "INSERT INTO payments (order_id, amount, status) VALUES ($1, $2, 'pending')",
+        order_id, amount
+    )
 
 
 def process_refund(order_id: str, amount: float):
@@ -214,33 +475,31 @@ def process_refund(order_id: str, amount: float):
     pass
 
 
-def fetch_user_orders_from_db(user_id: str, limit: int):
+async def fetch_user_orders_from_db(db: DBExecutor, user_id: str, limit: int) -> List[Order]:
     """Fetch user orders from database - NO LOGGING"""
     # Database query with no logging - GAP!
-    return []
+    rows = await db.fetch(
+        "SELECT order_id, user_id, items, total_amount, status, created_at FROM orders "
+        "WHERE user_id = $1 ORDER BY created_at DESC LIMIT $2",
+        user_id, limit
+    )
+    return [order_from_row(row) for row in rows]
+
 
+async def _init_connection(con: asyncpg.Connection):
+    """Decode jsonb columns (order items) to Python objects"""
+    await con.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
 
-def notify_shipping_service(order_id: str):
+
+async def notify_shipping_service(http: httpx.AsyncClient, order_id: str):
     """Notify shipping service - NO LOGGING"""
     # External service call with NO LOGGING - GAP!
-    import requests
-    # Simulated external API call
+    response = await http.post(SHIPPING_SERVICE_URL, json={"order_id": order_id})
     # NO LOGGING OF API CALL OR RESPONSE - GAP!
-    pass
-
-
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Order Service starting up")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    # NO SHUTDOWN LOGGING - GAP!
-    pass
+    response.raise_for_status()
 
 
 if __name__ == "__main__":
     import uvicorn
-    logger.info("Starting Order Service on port 8001")
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # uvloop event loop + httptools parser (both ship with uvicorn[standard])
+    uvicorn.run(app, host="0.0.0.0", port=8001, loop="uvloop", http="httptools")
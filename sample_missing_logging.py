@@ -3,7 +3,8 @@ User management and payment processing service.
 Handles user authentication, payments, and data operations.
 """
 
-import requests
+import httpx
+from contextlib import contextmanager
 from typing import Dict, List, Optional
 from datetime import datetime
 
@@ -128,6 +129,18 @@ class DatabaseManager:
         """Rollback database transaction."""
         pass
     
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed statements in one transaction, rolling back on error."""
+        self.begin_transaction()
+        try:
+            yield self
+        except Exception:
+            self.rollback_transaction()
+            raise
+        else:
+            self.commit_transaction()
+    
     def _run_query(self, query: str, params: Dict) -> List[Dict]:
         return []
 
@@ -138,12 +151,17 @@ class APIClient:
     def __init__(self, base_url: str, timeout: int = 30):
         self.base_url = base_url
         self.timeout = timeout
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+            http2=True
+        )
     
-    def get_user_data(self, user_id: str) -> Optional[Dict]:
+    async def get_user_data(self, user_id: str) -> Optional[Dict]:
         """Fetch user data from external API."""
         try:
             url = f"{self.base_url}/users/{user_id}"
-            response = requests.get(url, timeout=self.timeout)
+            response = await self.client.get(url)
             
             if response.status_code == 200:
                 return response.json()
@@ -151,19 +169,23 @@ class APIClient:
                 return None
             else:
                 return None
-        except requests.Timeout:
+        except httpx.TimeoutException:
             return None
-        except requests.RequestException:
+        except httpx.HTTPError:
             return None
     
-    def post_data(self, endpoint: str, data: Dict) -> bool:
+    async def post_data(self, endpoint: str, data: Dict) -> bool:
         """Post data to external API."""
         try:
             url = f"{self.base_url}{endpoint}"
-            response = requests.post(url, json=data, timeout=self.timeout)
+            response = await self.client.post(url, json=data)
             return response.status_code == 200
         except Exception:
             return False
+    
+    async def aclose(self):
+        """Close pooled connections."""
+        await self.client.aclose()
 
 
 if __name__ == "__main__":
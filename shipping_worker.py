@@ -0,0 +1,83 @@
+"""
+Shipping Worker - background consumer
+Reads the order service's shipping_notifications stream and calls the shipping service
+"""
+
+import asyncio
+import logging
+import os
+import socket
+
+import httpx
+import redis.asyncio as aioredis
+
+from order_service import REDIS_URL, SHIPPING_STREAM, configure_logging, notify_shipping_service
+
+logger = logging.getLogger(__name__)
+
+CONSUMER_GROUP = "shipping_workers"
+# Unique per process so each worker owns its own pending entries
+CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+MAX_ATTEMPTS = 5
+# Entries that gave up after MAX_ATTEMPTS are parked here for inspection and replay
+DEAD_LETTER_STREAM = f"{SHIPPING_STREAM}:dead"
+# Pending entries idle this long belong to a crashed worker. Each batch is delivered
+# concurrently, so no entry waits longer than one deliver() worst case
+# (MAX_ATTEMPTS * 30 s timeout + 15 s of backoff = 165 s)
+RECLAIM_IDLE_MS = 300_000
+
+
+async def deliver(http: httpx.AsyncClient, order_id: str):
+    """Call the shipping service, retrying with exponential backoff"""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            await notify_shipping_service(http, order_id)
+            return True
+        except Exception as e:
+            logger.warning("Shipping notification failed for %s (attempt %d): %s", order_id, attempt + 1, e)
+            if attempt + 1 < MAX_ATTEMPTS:
+                await asyncio.sleep(2 ** attempt)
+    return False
+
+
+async def handle(redis: aioredis.Redis, http: httpx.AsyncClient, message_id: str, fields: dict):
+    """Deliver one entry, dead-lettering it on failure; either way it leaves the pending list"""
+    if fields and not await deliver(http, fields["order_id"]):
+        logger.error("Giving up on shipping notification for order %s", fields["order_id"])
+        await redis.xadd(DEAD_LETTER_STREAM, {**fields, "source_id": message_id})
+    await redis.xack(SHIPPING_STREAM, CONSUMER_GROUP, message_id)
+
+
+async def run():
+    redis = aioredis.from_url(REDIS_URL, decode_responses=True)
+    # One pooled keep-alive client for every notification this worker sends
+    http = httpx.AsyncClient(
+        timeout=30, limits=httpx.Limits(max_connections=200, max_keepalive_connections=50), http2=True
+    )
+    try:
+        await redis.xgroup_create(SHIPPING_STREAM, CONSUMER_GROUP, id="0", mkstream=True)
+    except aioredis.ResponseError:
+        # Group already exists
+        pass
+
+    logger.info("Shipping worker %s started", CONSUMER_NAME)
+    while True:
+        # Take over entries left pending by workers that died mid-delivery
+        reclaimed = await redis.xautoclaim(
+            SHIPPING_STREAM, CONSUMER_GROUP, CONSUMER_NAME, min_idle_time=RECLAIM_IDLE_MS, count=10
+        )
+        await asyncio.gather(*(handle(redis, http, message_id, fields) for message_id, fields in reclaimed[1]))
+
+        entries = await redis.xreadgroup(
+            CONSUMER_GROUP, CONSUMER_NAME, {SHIPPING_STREAM: ">"}, count=10, block=5000
+        )
+        await asyncio.gather(*(
+            handle(redis, http, message_id, fields)
+            for _, messages in entries
+            for message_id, fields in messages
+        ))
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(run())
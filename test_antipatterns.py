@@ -3,11 +3,23 @@
 Test file with intentional logging anti-patterns for testing Stage 9
 """
 
+import atexit
 import logging
+import logging.handlers
 import json
+import queue
+import re
 
 logger = logging.getLogger(__name__)
 
+# Callers only enqueue; the listener thread does the stream writes
+_log_queue = queue.Queue(-1)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.propagate = False
+_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(), respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)
+
 def authenticate_user(username, password, email):
     """
     CRITICAL ANTI-PATTERN: Logging sensitive data (password, email)
@@ -31,10 +43,13 @@ def batch_process_records(records):
     """
     HIGH ANTI-PATTERN: Logging in hot loop (10,000+ iterations)
     """
-    logger.info(f"Starting batch processing of {len(records)} records")
+    logger.info("Starting batch processing of %d records", len(records))
     
+    # Level resolved once instead of walking the logger hierarchy per iteration
+    info_on = logger.isEnabledFor(logging.INFO)
     for record in records:
-        logger.info(f"Processing record: {record.id}")  # BAD: In loop
+        if info_on:
+            logger.info("Processing record: %s", record.id)  # BAD: In loop
         record.process()
     
     logger.info("Batch processing complete")
@@ -43,7 +58,8 @@ def recursive_tree_walker(node, depth=0):
     """
     HIGH ANTI-PATTERN: Logging in recursive function
     """
-    logger.debug(f"Visiting node: {node.name} at depth {depth}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Visiting node: %s at depth %d", node.name, depth)
     
     for child in node.children:
         recursive_tree_walker(child, depth + 1)  # Recursion with logging
@@ -83,10 +99,11 @@ def process_large_dataset(data):
     """
     MEDIUM ANTI-PATTERN: Logging large objects
     """
-    logger.info(f"Processing data: {data}")  # BAD: 'data' might be huge
+    logger.info("Processing data: %s", data)  # BAD: 'data' might be huge
     
     results = analyze(data)
-    logger.debug(f"Results: {results}")  # BAD: Large object
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Results: %s", results)  # BAD: Large object
     
     return results
 
@@ -110,27 +127,69 @@ def log_jwt_token(token):
 
 # Good examples for comparison
 
+# One pre-compiled alternation: each message is scanned once, not once per pattern
+_PII_RE = re.compile(
+    r"(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})"
+    r"|(?P<ssn>\b\d{3}-\d{2}-\d{4}\b)"
+    r"|(?P<jwt>eyJ[A-Za-z0-9_\-]{10,}\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+)"
+    r"|(?P<cc>\b\d{13,19}\b)"
+    r"|(?P<apikey>sk-[A-Za-z0-9]{16,})"
+)
+
+def redact_pii(message):
+    """
+    GOOD: Scrub secrets from a log message in a single regex pass
+    """
+    return _PII_RE.sub(lambda m: f"[REDACTED_{m.lastgroup.upper()}]", message)
+
+def log_user_event_good(user, event):
+    """
+    GOOD: Free-form text is redacted before it reaches the log
+    """
+    logger.info("User %s event: %s", user.id, redact_pii(event))
+
 def authenticate_user_good(username):
     """
     GOOD: No sensitive data logged
     """
-    logger.info(f"Login attempt for user: {username}", extra={'success': True})
+    logger.info("Login attempt for user: %s", username, extra={'success': True})
 
 def batch_process_records_good(records):
     """
     GOOD: Summary logging instead of per-item
     """
-    logger.info(f"Processing {len(records)} records")
+    total = len(records)
+    logger.info("Processing %d records", total)
     
+    processed = 0
     errors = []
     for record in records:
         try:
             record.process()
-        except Exception as e:
+        except Exception:
             errors.append(record.id)
-            logger.error(f"Failed to process record {record.id}: {e}")
+        processed += 1
+        if processed % 1000 == 0:
+            logger.info("Processed %d/%d (errors=%d)", processed, total, len(errors))
+    
+    logger.info("Completed %d/%d records (errors=%d)", total - len(errors), total, len(errors))
+    if errors:
+        logger.error("Failed to process %d records, first ids: %s", len(errors), errors[:10])
+
+def tree_walker_good(root):
+    """
+    GOOD: Iterative walk with an explicit stack and a single summary log
+    """
+    visited = 0
+    max_depth = 0
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        visited += 1
+        max_depth = max(max_depth, depth)
+        stack.extend((child, depth + 1) for child in node.children)
     
-    logger.info(f"Completed {len(records) - len(errors)}/{len(records)} records")
+    logger.debug("Visited %d nodes (max depth %d)", visited, max_depth)
 
 def load_user_data_good(user_id):
     """
@@ -140,7 +199,7 @@ def load_user_data_good(user_id):
         data = fetch_from_db(user_id)
         return json.loads(data)
     except Exception as e:
-        logger.error(f"Failed to load user data: {e}", 
+        logger.error("Failed to load user data: %s", e,
                     extra={'user_id': user_id},
                     exc_info=True)
         raise
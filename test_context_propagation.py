@@ -6,8 +6,9 @@ This file demonstrates various context propagation patterns and gaps.
 import logging
 from flask import Flask, g, request
 from fastapi import Depends, Request
-from contextvars import ContextVar
+from contextvars import ContextVar, copy_context
 import asyncio
+import sys
 from functools import wraps
 
 logger = logging.getLogger(__name__)
@@ -16,6 +17,12 @@ logger = logging.getLogger(__name__)
 request_id_var: ContextVar[str] = ContextVar('request_id', default=None)
 user_id_var: ContextVar[str] = ContextVar('user_id', default=None)
 
+# Messages shared by the broken and correct call chains below
+_MSG_REQUEST = sys.intern("Request received")
+_MSG_BL = sys.intern("Processing business logic")
+_MSG_DB = sys.intern("Executing database query")
+_MSG_API = sys.intern("Calling external API")
+
 
 # ============================================================================
 # MISSING CONTEXT PROPAGATION - Tool 6 should detect these gaps
@@ -86,7 +93,7 @@ def api_endpoint_broken(request):
     request_id = request.headers.get('X-Request-ID', 'req-12345')
     
     # ❌ GAP: request_id created but not passed to service
-    logger.info(f"Request received", extra={'request_id': request_id})
+    logger.info(_MSG_REQUEST, extra={'request_id': request_id})
     
     # Lost context here - service call without request_id
     result = process_business_logic()  # ❌ GAP: No request_id argument
@@ -97,7 +104,7 @@ def api_endpoint_broken(request):
 def process_business_logic():
     """Business logic that lost the context"""
     # ❌ GAP: No request_id parameter - can't correlate logs
-    logger.info("Processing business logic")
+    logger.info(_MSG_BL)
     
     # Call database without context
     data = query_database()  # ❌ GAP
@@ -111,14 +118,14 @@ def process_business_logic():
 def query_database():
     """Database query without correlation"""
     # ❌ GAP: Critical database operation not correlated to request
-    logger.info("Executing database query")
+    logger.info(_MSG_DB)
     return {"data": "result"}
 
 
 def call_external_api():
     """External API call without correlation"""
     # ❌ GAP: External service call not correlated
-    logger.info("Calling external API")
+    logger.info(_MSG_API)
     return {"status": "ok"}
 
 
@@ -234,7 +241,7 @@ def api_endpoint_good(request):
     """✓ GOOD: API endpoint with proper context propagation"""
     request_id = request.headers.get('X-Request-ID', 'req-12345')
     
-    logger.info(f"Request received", extra={'request_id': request_id})
+    logger.info(_MSG_REQUEST, extra={'request_id': request_id})
     
     # ✓ GOOD: request_id passed to business logic
     result = process_business_logic_good(request_id)
@@ -244,7 +251,7 @@ def api_endpoint_good(request):
 
 def process_business_logic_good(request_id):
     """✓ GOOD: Business logic with context"""
-    logger.info("Processing business logic", extra={'request_id': request_id})
+    logger.info(_MSG_BL, extra={'request_id': request_id})
     
     # ✓ GOOD: Context propagated to database
     data = query_database_good(request_id)
@@ -257,13 +264,13 @@ def process_business_logic_good(request_id):
 
 def query_database_good(request_id):
     """✓ GOOD: Database query with correlation"""
-    logger.info("Executing database query", extra={'request_id': request_id})
+    logger.info(_MSG_DB, extra={'request_id': request_id})
     return {"data": "result"}
 
 
 def call_external_api_good(request_id):
     """✓ GOOD: External API with correlation"""
-    logger.info("Calling external API", extra={'request_id': request_id})
+    logger.info(_MSG_API, extra={'request_id': request_id})
     return {"status": "ok"}
 
 
@@ -309,11 +316,10 @@ async def async_process_order_good(order_id):
                extra={'request_id': request_id})
     
     # ✓ GOOD: Context automatically propagated in async tasks
-    await asyncio.gather(
-        send_email_async_good(order_id),
-        update_inventory_async_good(order_id),
-        notify_shipping_async_good(order_id)
-    )
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(send_email_async_good(order_id))
+        tg.create_task(update_inventory_async_good(order_id))
+        tg.create_task(notify_shipping_async_good(order_id))
 
 
 async def send_email_async_good(order_id):
@@ -345,29 +351,25 @@ async def notify_shipping_async_good(order_id):
 # ============================================================================
 
 def with_request_context(func):
-    """✓ GOOD: Decorator to automatically inject request context"""
+    """✓ GOOD: Decorator to run the function inside the caller's request context"""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        request_id = request_id_var.get()
-        if request_id:
-            # Inject request_id into kwargs if not present
-            if 'request_id' not in kwargs:
-                kwargs['request_id'] = request_id
-        return func(*args, **kwargs)
+        # Context.run is a C-level call - no per-call kwargs patching needed
+        return copy_context().run(func, *args, **kwargs)
     return wrapper
 
 
 @with_request_context
-def decorated_function(data, request_id=None):
-    """✓ GOOD: Function automatically gets request_id from decorator"""
-    logger.info(f"Processing data", extra={'request_id': request_id})
-    return process_data(data, request_id)
+def decorated_function(data):
+    """✓ GOOD: Function reads request_id from the propagated context"""
+    logger.info(f"Processing data", extra={'request_id': request_id_var.get()})
+    return process_data(data)
 
 
 @with_request_context
-def process_data(data, request_id=None):
+def process_data(data):
     """✓ GOOD: Context propagated through decorator"""
-    logger.info(f"Data processing", extra={'request_id': request_id})
+    logger.info(f"Data processing", extra={'request_id': request_id_var.get()})
     return {"processed": True}
 
 
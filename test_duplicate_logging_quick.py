@@ -15,17 +15,20 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.agent.tools.tool_12_duplicate_logging_detector import detect_duplicate_logging
 
+# Stdlib json on purpose: the output-format test checks what is actually stored.
+# Encoder state built once instead of on every json.dumps call
+dumps_indented = json.JSONEncoder(indent=2).encode
+
 
 def print_section(title):
     """Print a formatted section header"""
-    print(f"\n{'='*60}")
-    print(f"  {title}")
-    print(f"{'='*60}\n")
+    sys.stdout.write(f"\n{'='*60}\n  {title}\n{'='*60}\n\n")
 
 
 def test_exact_duplicates():
     """Test 1: Exact Duplicate Detection"""
     print_section("TEST 1: Exact Duplicate Detection")
+    out = []
     
     logging_statements = [
         {"message": "User logged in successfully", "file_path": "auth/login.py", "line_number": 42, "function": "handle_login"},
@@ -39,25 +42,27 @@ def test_exact_duplicates():
         repository_path="/tmp/test"
     )
     
-    print(f"✅ Success: {result['success']}")
-    print(f"📊 Mode: {result['detection_mode']}")
-    print(f"🔍 Total Duplicates Found: {result['statistics']['total_duplicates']}")
-    print(f"📝 Message: {result['message']}")
+    out.append(f"✅ Success: {result['success']}")
+    out.append(f"📊 Mode: {result['detection_mode']}")
+    out.append(f"🔍 Total Duplicates Found: {result['statistics']['total_duplicates']}")
+    out.append(f"📝 Message: {result['message']}")
     
     if result['duplicate_logs']:
         dup = result['duplicate_logs'][0]
-        print(f"\n📋 First Duplicate:")
-        print(f"   Type: {dup['type']}")
-        print(f"   Severity: {dup['severity']}")
-        print(f"   Occurrences: {dup['occurrences']}")
-        print(f"   Recommendation: {dup['recommendation']}")
+        out.append(f"\n📋 First Duplicate:")
+        out.append(f"   Type: {dup['type']}")
+        out.append(f"   Severity: {dup['severity']}")
+        out.append(f"   Occurrences: {dup['occurrences']}")
+        out.append(f"   Recommendation: {dup['recommendation']}")
     
+    sys.stdout.write("\n".join(out) + "\n")
     return result['success']
 
 
 def test_log_spam():
     """Test 2: Log Spam Detection"""
     print_section("TEST 2: Log Spam Detection (Loops)")
+    out = []
     
     logging_statements = [
         {
@@ -76,23 +81,25 @@ def test_log_spam():
         repository_path="/tmp/test"
     )
     
-    print(f"✅ Success: {result['success']}")
-    print(f"🔁 Log Spam Found: {result['statistics']['by_type'].get('spam', 0)}")
+    out.append(f"✅ Success: {result['success']}")
+    out.append(f"🔁 Log Spam Found: {result['statistics']['by_type'].get('spam', 0)}")
     
     if result['duplicate_logs']:
         spam = result['duplicate_logs'][0]
-        print(f"\n🔁 Spam Details:")
-        print(f"   Type: {spam['type']}")
-        print(f"   Severity: {spam['severity']}")
-        print(f"   Message: {spam['message']}")
-        print(f"   Recommendation: {spam['recommendation'][:100]}...")
+        out.append(f"\n🔁 Spam Details:")
+        out.append(f"   Type: {spam['type']}")
+        out.append(f"   Severity: {spam['severity']}")
+        out.append(f"   Message: {spam['message']}")
+        out.append(f"   Recommendation: {spam['recommendation'][:100]}...")
     
+    sys.stdout.write("\n".join(out) + "\n")
     return result['success']
 
 
 def test_noise_logs():
     """Test 3: Noise Log Detection"""
     print_section("TEST 3: Noise Log Detection")
+    out = []
     
     logging_statements = [
         {"message": "Entering function", "file_path": "service.py", "line_number": 10, "function": "some_function", "level": "DEBUG"},
@@ -105,15 +112,17 @@ def test_noise_logs():
         repository_path="/tmp/test"
     )
     
-    print(f"✅ Success: {result['success']}")
-    print(f"🔇 Noise Logs Found: {result['statistics']['by_type'].get('noise', 0)}")
+    out.append(f"✅ Success: {result['success']}")
+    out.append(f"🔇 Noise Logs Found: {result['statistics']['by_type'].get('noise', 0)}")
     
+    sys.stdout.write("\n".join(out) + "\n")
     return result['success']
 
 
 def test_mixed_duplicates():
     """Test 4: Mixed Types"""
     print_section("TEST 4: Mixed Duplicate Types")
+    out = []
     
     logging_statements = [
         # Exact duplicates
@@ -137,25 +146,27 @@ def test_mixed_duplicates():
         repository_path="/tmp/test"
     )
     
-    print(f"✅ Success: {result['success']}")
-    print(f"📊 Statistics:")
-    print(f"   Total Duplicates: {result['statistics']['total_duplicates']}")
-    print(f"   Total Affected Locations: {result['statistics']['total_affected_locations']}")
+    out.append(f"✅ Success: {result['success']}")
+    out.append(f"📊 Statistics:")
+    out.append(f"   Total Duplicates: {result['statistics']['total_duplicates']}")
+    out.append(f"   Total Affected Locations: {result['statistics']['total_affected_locations']}")
     
-    print(f"\n📋 By Type:")
+    out.append(f"\n📋 By Type:")
     for dup_type, count in result['statistics']['by_type'].items():
-        print(f"   - {dup_type}: {count}")
+        out.append(f"   - {dup_type}: {count}")
     
-    print(f"\n⚠️  By Severity:")
+    out.append(f"\n⚠️  By Severity:")
     for severity, count in result['statistics']['by_severity'].items():
-        print(f"   - {severity}: {count}")
+        out.append(f"   - {severity}: {count}")
     
+    sys.stdout.write("\n".join(out) + "\n")
     return result['success']
 
 
 def test_output_format():
     """Test 5: Output Format (JSON Serialization)"""
     print_section("TEST 5: Output Format Validation")
+    out = []
     
     logging_statements = [
         {"message": "Test log", "file_path": "test.py", "line_number": 1, "function": "test", "level": "INFO"}
@@ -169,20 +180,22 @@ def test_output_format():
     
     # Test JSON serialization (for database storage)
     try:
-        json_str = json.dumps(result, indent=2)
+        json_str = dumps_indented(result)
         parsed = json.loads(json_str)
-        print("✅ Output is JSON-serializable")
-        print(f"📦 Output size: {len(json_str)} bytes")
-        print(f"\n📄 Sample output structure:")
-        print(json.dumps({
+        out.append("✅ Output is JSON-serializable")
+        out.append(f"📦 Output size: {len(json_str)} bytes")
+        out.append(f"\n📄 Sample output structure:")
+        out.append(dumps_indented({
             "success": parsed["success"],
             "detection_mode": parsed["detection_mode"],
             "statistics": parsed["statistics"],
             "duplicate_logs_count": len(parsed["duplicate_logs"])
-        }, indent=2))
+        }))
+        sys.stdout.write("\n".join(out) + "\n")
         return True
     except Exception as e:
-        print(f"❌ JSON serialization failed: {e}")
+        out.append(f"❌ JSON serialization failed: {e}")
+        sys.stdout.write("\n".join(out) + "\n")
         return False
 
 
@@ -3,13 +3,269 @@ Test file for Service Dependency Detection (Tool 5)
 This file contains various service calls that should be detected by the analyzer.
 """
 
-import requests
-import json
+import atexit
+import contextlib
+import functools
+import hashlib
+import inspect
+import io
+import itertools
+import logging
+import random
+import threading
+import time
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import asyncio
 import aiohttp
-from typing import Dict, Any, List
+from typing import Dict, Any, List, BinaryIO, Iterator, Tuple, Union
 import grpc
+import grpc.aio
+import httpx
+import ijson
+import kafka
 import websockets
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+# Every call fails within bounded time: 3.05 s to connect (just over a TCP SYN retransmit), 10 s for the rest
+_TIMEOUT = httpx.Timeout(10.0, connect=3.05)
+_ATIMEOUT = aiohttp.ClientTimeout(total=10, connect=3.05)
+
+# HTTP/2 client shared by the third-party integrations below: concurrent calls to one host
+# multiplex as streams over a single TLS connection instead of opening one socket each
+_CLIENT = httpx.Client(
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    ),
+    timeout=_TIMEOUT
+)
+atexit.register(_CLIENT.close)
+# Fan-out for endpoints without a batch API; sized to the client's keep-alive pool
+_PUBLISH_POOL = ThreadPoolExecutor(max_workers=50)
+atexit.register(_PUBLISH_POOL.shutdown)
+
+
+class _BackgroundLoop:
+    """Long-lived event loop and aiohttp session on a daemon thread, for async fan-out from sync code"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._session = None
+    
+    def submit(self, make_coro) -> concurrent.futures.Future:
+        """Schedule make_coro(session) on the shared loop; safe to call from any thread or running loop"""
+        with self._lock:
+            if self._loop is None:
+                self._start()
+        return asyncio.run_coroutine_threadsafe(make_coro(self._session), self._loop)
+    
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="background-loop", daemon=True).start()
+        # The session must be created on the loop that will use it
+        self._session = asyncio.run_coroutine_threadsafe(self._open_session(), loop).result()
+        self._loop = loop
+        atexit.register(self._stop)
+    
+    async def _open_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(timeout=_ATIMEOUT, json_serialize=_dumps)
+    
+    def _stop(self):
+        asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_BACKGROUND = _BackgroundLoop()
+
+
+def _dumps(obj) -> str:
+    """orjson encoder for APIs that expect str (aiohttp json_serialize, WebSocket frames)"""
+    return orjson.dumps(obj).decode()
+
+
+def _upload_body(data: Union[bytes, BinaryIO]) -> Tuple[Union[bytes, Iterator[bytes]], Dict[str, str]]:
+    """Body and length headers for an upload; file objects are streamed rather than read into memory
+
+    Seekable files are measured for Content-Length. Pipes, sockets and other non-seekable
+    streams get no Content-Length, so the client falls back to chunked transfer encoding.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data), {'Content-Length': str(len(data))}
+    chunks = iter(functools.partial(data.read, 64 * 1024), b'')
+    if not data.seekable():
+        return chunks, {}
+    start = data.tell()
+    length = data.seek(0, io.SEEK_END) - start
+    data.seek(start)
+    return chunks, {'Content-Length': str(length)}
+
+
+def _backoff(attempt: int, base: float = 0.5, max_delay: float = 30.0) -> float:
+    """Exponential backoff with +/-25% jitter so reconnecting clients don't stampede"""
+    return min(max_delay, base * 2 ** attempt) * random.uniform(0.75, 1.25)
+
+
+class CircuitOpenError(Exception):
+    """Raised while a circuit breaker is open and calls are being short-circuited"""
+
+
+class CircuitBreaker:
+    """Stop calling a dependency after consecutive failures, then retry once the cooldown elapses
+
+    CLOSED passes every call. OPEN rejects calls until the cooldown elapses, then the breaker
+    goes HALF_OPEN and admits a single trial call: success closes it, failure reopens it.
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+    
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60.0,
+                 expected_exception: Tuple[type, ...] = (Exception,)):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.expected_exception = expected_exception
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    @contextlib.contextmanager
+    def guard(self):
+        """Wrap one call: fail fast while open, count expected exceptions as failures"""
+        self.check()
+        try:
+            yield
+        except self.expected_exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Not a dependency failure (e.g. cancellation) - let another caller run the trial
+            self._release_trial()
+            raise
+        self.record_success()
+    
+    def check(self):
+        """Raise CircuitOpenError unless this call may go through"""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.cooldown - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(f"circuit open for another {remaining:.1f}s")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError("circuit half-open, trial call in progress")
+                self._trial_in_flight = True
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+    
+    def _release_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+
+_CACHE_INIT_LOCK = threading.Lock()
+
+
+def cached_http(ttl: int = 300, maxsize: int = 10_000, cacheable=lambda result: result is not None):
+    """Memoize an idempotent read per client instance; pass cache_skip=True to bypass
+
+    Only results that pass `cacheable` are stored, and the wrapped call should raise on
+    non-2xx responses so error payloads never reach the cache. Results are stored serialized,
+    so every hit returns a fresh object that callers may mutate. Writers evict what they
+    change with `Cls.method.invalidate(self, *args)` or `Cls.method.cache_clear(self)`.
+    """
+    def decorator(func):
+        cache_attr = f"_cache_{func.__name__}"
+        signature = inspect.signature(func)
+        
+        def get_cache(self):
+            # (cache, lock); TTLCache isn't thread-safe, so every access goes through the lock
+            entry = self.__dict__.get(cache_attr)
+            if entry is None:
+                with _CACHE_INIT_LOCK:
+                    entry = self.__dict__.get(cache_attr)
+                    if entry is None:
+                        entry = self.__dict__[cache_attr] = (TTLCache(maxsize=maxsize, ttl=ttl), threading.Lock())
+            return entry
+        
+        def make_key(self, args, kwargs):
+            # Bind to the signature so f(1) and f(user_id=1) share an entry
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = list(bound.arguments.values())[1:]
+            return hashlib.blake2b(
+                orjson.dumps([func.__qualname__, arguments], option=orjson.OPT_SORT_KEYS),
+                digest_size=16
+            ).digest()
+        
+        def lookup(self, args, kwargs):
+            cache, lock = get_cache(self)
+            key = make_key(self, args, kwargs)
+            with lock:
+                cached = cache.get(key)
+            return cache, lock, key, cached
+        
+        def store(cache, lock, key, result):
+            if cacheable(result):
+                data = orjson.dumps(result)
+                with lock:
+                    cache[key] = data
+            return result
+        
+        def invalidate(self, *args, **kwargs):
+            cache, lock = get_cache(self)
+            key = make_key(self, args, kwargs)
+            with lock:
+                cache.pop(key, None)
+        
+        def cache_clear(self):
+            cache, lock = get_cache(self)
+            with lock:
+                cache.clear()
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(self, *args, cache_skip: bool = False, **kwargs):
+                if cache_skip:
+                    return await func(self, *args, **kwargs)
+                cache, lock, key, cached = lookup(self, args, kwargs)
+                if cached is not None:
+                    return orjson.loads(cached)
+                return store(cache, lock, key, await func(self, *args, **kwargs))
+        else:
+            @functools.wraps(func)
+            def wrapper(self, *args, cache_skip: bool = False, **kwargs):
+                if cache_skip:
+                    return func(self, *args, **kwargs)
+                cache, lock, key, cached = lookup(self, args, kwargs)
+                if cached is not None:
+                    return orjson.loads(cached)
+                return store(cache, lock, key, func(self, *args, **kwargs))
+        
+        wrapper.invalidate = invalidate
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
 
 
 # ============================================================================
@@ -21,38 +277,57 @@ class UserServiceClient:
     
     def __init__(self, base_url: str):
         self.base_url = base_url
-        self.session = requests.Session()
+        # Keep-alive pool shared by every call so TLS handshakes are amortized
+        self.session = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            ),
+            timeout=_TIMEOUT
+        )
     
     def get_user(self, user_id: int) -> Dict:
         """Get user by ID - should be logged"""
         # SERVICE DEPENDENCY: HTTP GET to user service
-        response = requests.get(f"{self.base_url}/api/users/{user_id}")
+        response = self.session.get(f"{self.base_url}/api/users/{user_id}")
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
+    
+    async def get_users(self, user_ids: List[int]) -> List[Dict]:
+        """Get many users concurrently - should be logged"""
+        # SERVICE DEPENDENCY: Concurrent HTTP GETs to user service
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=32), timeout=_ATIMEOUT, json_serialize=_dumps) as session:
+            async def fetch(user_id: int) -> Dict:
+                async with session.get(f"{self.base_url}/api/users/{user_id}") as response:
+                    response.raise_for_status()
+                    return await response.json(loads=orjson.loads)
+            
+            return await asyncio.gather(*(fetch(user_id) for user_id in user_ids))
     
     def create_user(self, user_data: Dict) -> Dict:
         """Create new user - should be logged"""
         # SERVICE DEPENDENCY: HTTP POST to user service
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/users",
             json=user_data,
             headers={'Content-Type': 'application/json'}
         )
-        return response.json()
+        return orjson.loads(response.content)
     
     def update_user(self, user_id: int, updates: Dict) -> Dict:
         """Update user - should be logged"""
         # SERVICE DEPENDENCY: HTTP PUT to user service
-        response = requests.put(
+        response = self.session.put(
             f"{self.base_url}/api/users/{user_id}",
             json=updates
         )
-        return response.json()
+        return orjson.loads(response.content)
     
     def delete_user(self, user_id: int) -> bool:
         """Delete user - should be logged"""
         # SERVICE DEPENDENCY: HTTP DELETE to user service
-        response = requests.delete(f"{self.base_url}/api/users/{user_id}")
+        response = self.session.delete(f"{self.base_url}/api/users/{user_id}")
         return response.status_code == 204
     
     def search_users(self, query: str) -> List[Dict]:
@@ -62,7 +337,7 @@ class UserServiceClient:
             f"{self.base_url}/api/users/search",
             params={'q': query, 'limit': 10}
         )
-        return response.json()
+        return orjson.loads(response.content)
 
 
 # ============================================================================
@@ -72,87 +347,123 @@ class UserServiceClient:
 class PaymentGateway:
     """Payment gateway integration"""
     
+    # Shared by every instance: an outage is per provider, not per client object.
+    # 5xx responses and non-JSON error pages count as failures; 4xx (e.g. declined cards) don't
+    _BREAKER = CircuitBreaker(
+        failure_threshold=5,
+        cooldown=60.0,
+        expected_exception=(httpx.TransportError, httpx.HTTPStatusError, orjson.JSONDecodeError)
+    )
+    
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.gateway_url = "https://api.stripe.com/v1"
+        self._charges_url = f"{self.gateway_url}/charges"
+        self._customers_url = f"{self.gateway_url}/customers"
+        self._refunds_url = f"{self.gateway_url}/refunds"
+        self._session = _CLIENT
+        self._auth = (api_key, '')
     
     def process_payment(self, amount: float, currency: str, card_token: str) -> Dict:
         """Process payment via Stripe - should be logged"""
         # SERVICE DEPENDENCY: External payment service
-        response = requests.post(
-            f"{self.gateway_url}/charges",
-            data={
-                'amount': int(amount * 100),
-                'currency': currency,
-                'source': card_token
-            },
-            auth=(self.api_key, '')
-        )
-        return response.json()
+        with self._BREAKER.guard():
+            response = self._session.post(
+                self._charges_url,
+                data={
+                    'amount': int(amount * 100),
+                    'currency': currency,
+                    'source': card_token
+                },
+                auth=self._auth
+            )
+            if response.is_server_error:
+                response.raise_for_status()
+            return orjson.loads(response.content)
     
     def create_customer(self, email: str, name: str) -> Dict:
         """Create customer in Stripe - should be logged"""
         # SERVICE DEPENDENCY: External payment service
-        response = requests.post(
-            f"{self.gateway_url}/customers",
-            data={'email': email, 'name': name},
-            auth=(self.api_key, '')
-        )
-        return response.json()
+        with self._BREAKER.guard():
+            response = self._session.post(
+                self._customers_url,
+                data={'email': email, 'name': name},
+                auth=self._auth
+            )
+            if response.is_server_error:
+                response.raise_for_status()
+            return orjson.loads(response.content)
     
     def refund_payment(self, charge_id: str) -> Dict:
         """Refund payment - should be logged"""
         # SERVICE DEPENDENCY: External payment service
-        response = requests.post(
-            f"{self.gateway_url}/refunds",
-            data={'charge': charge_id},
-            auth=(self.api_key, '')
-        )
-        return response.json()
+        with self._BREAKER.guard():
+            response = self._session.post(
+                self._refunds_url,
+                data={'charge': charge_id},
+                auth=self._auth
+            )
+            if response.is_server_error:
+                response.raise_for_status()
+            return orjson.loads(response.content)
 
 
 class EmailService:
     """Email service integration (SendGrid)"""
     
+    _BREAKER = CircuitBreaker(
+        failure_threshold=5,
+        cooldown=60.0,
+        expected_exception=(aiohttp.ClientError, asyncio.TimeoutError)
+    )
+    
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.sendgrid.com/v3"
+        self._mail_url = f"{self.base_url}/mail/send"
+        self._headers = {
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json'
+        }
     
-    def send_email(self, to: str, subject: str, body: str) -> bool:
+    async def send_email(self, session: aiohttp.ClientSession, to: str, subject: str, body: str) -> bool:
         """Send email via SendGrid - should be logged"""
         # SERVICE DEPENDENCY: External email service
-        response = requests.post(
-            f"{self.base_url}/mail/send",
-            json={
-                'personalizations': [{'to': [{'email': to}]}],
-                'from': {'email': 'noreply@example.com'},
-                'subject': subject,
-                'content': [{'type': 'text/plain', 'value': body}]
-            },
-            headers={
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-        )
-        return response.status_code == 202
+        with self._BREAKER.guard():
+            async with session.post(
+                self._mail_url,
+                json={
+                    'personalizations': [{'to': [{'email': to}]}],
+                    'from': {'email': 'noreply@example.com'},
+                    'subject': subject,
+                    'content': [{'type': 'text/plain', 'value': body}]
+                },
+                headers=self._headers
+            ) as response:
+                if response.status >= 500:
+                    response.raise_for_status()
+                return response.status == 202
 
 
 class SMSService:
     """SMS service integration (Twilio)"""
     
-    def send_sms(self, phone: str, message: str) -> Dict:
+    _AUTH = aiohttp.BasicAuth('AC123', 'auth_token')
+    _MESSAGES_URL = "https://api.twilio.com/2010-04-01/Accounts/AC123/Messages.json"
+    
+    async def send_sms(self, session: aiohttp.ClientSession, phone: str, message: str) -> Dict:
         """Send SMS via Twilio - should be logged"""
         # SERVICE DEPENDENCY: External SMS service
-        response = requests.post(
-            "https://api.twilio.com/2010-04-01/Accounts/AC123/Messages.json",
+        async with session.post(
+            self._MESSAGES_URL,
             data={
                 'To': phone,
                 'From': '+1234567890',
                 'Body': message
             },
-            auth=('AC123', 'auth_token')
-        )
-        return response.json()
+            auth=self._AUTH
+        ) as response:
+            return await response.json(loads=orjson.loads)
 
 
 # ============================================================================
@@ -160,39 +471,54 @@ class SMSService:
 # ============================================================================
 
 class AsyncAPIClient:
-    """Async HTTP client using aiohttp"""
+    """Async HTTP client using aiohttp (use as `async with AsyncAPIClient() as client`)"""
+    
+    async def __aenter__(self):
+        # One session per client: connector, DNS cache and TLS pool are reused across calls
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=30,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            ),
+            timeout=_ATIMEOUT,
+            json_serialize=_dumps
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
     
+    @cached_http()
     async def fetch_user_async(self, user_id: int) -> Dict:
         """Async user fetch - should be logged"""
         # SERVICE DEPENDENCY: Async HTTP GET
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"http://api.example.com/users/{user_id}") as response:
-                return await response.json()
+        async with self._session.get(f"http://api.example.com/users/{user_id}") as response:
+            response.raise_for_status()
+            return await response.json(loads=orjson.loads)
     
     async def batch_fetch_users(self, user_ids: List[int]) -> List[Dict]:
         """Batch async fetches - should be logged"""
         # SERVICE DEPENDENCY: Multiple async HTTP calls
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for user_id in user_ids:
-                tasks.append(session.get(f"http://api.example.com/users/{user_id}"))
-            
-            responses = await asyncio.gather(*tasks)
-            results = []
-            for response in responses:
-                results.append(await response.json())
-            
-            return results
+        # Match the connector's per-host limit so requests don't queue inside aiohttp
+        semaphore = asyncio.Semaphore(30)
+        
+        async def fetch(user_id: int) -> Dict:
+            async with semaphore:
+                async with self._session.get(f"http://api.example.com/users/{user_id}") as response:
+                    return await response.json(loads=orjson.loads)
+        
+        return await asyncio.gather(*(fetch(user_id) for user_id in user_ids))
     
     async def post_analytics(self, event_data: Dict) -> bool:
         """Async analytics post - should be logged"""
         # SERVICE DEPENDENCY: Async HTTP POST
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "http://analytics.example.com/events",
-                json=event_data
-            ) as response:
-                return response.status == 200
+        async with self._session.post(
+            "http://analytics.example.com/events",
+            json=event_data
+        ) as response:
+            return response.status == 200
 
 
 # ============================================================================
@@ -202,13 +528,7 @@ class AsyncAPIClient:
 class GraphQLClient:
     """GraphQL API client"""
     
-    def __init__(self, endpoint: str):
-        self.endpoint = endpoint
-    
-    def query_user(self, user_id: int) -> Dict:
-        """GraphQL query - should be logged"""
-        # SERVICE DEPENDENCY: GraphQL query
-        query = """
+    GET_USER_QUERY = """
         query GetUser($userId: ID!) {
             user(id: $userId) {
                 id
@@ -221,20 +541,8 @@ class GraphQLClient:
             }
         }
         """
-        
-        response = requests.post(
-            self.endpoint,
-            json={
-                'query': query,
-                'variables': {'userId': user_id}
-            }
-        )
-        return response.json()
     
-    def create_post(self, title: str, content: str, author_id: int) -> Dict:
-        """GraphQL mutation - should be logged"""
-        # SERVICE DEPENDENCY: GraphQL mutation
-        mutation = """
+    CREATE_POST_MUTATION = """
         mutation CreatePost($title: String!, $content: String!, $authorId: ID!) {
             createPost(title: $title, content: $content, authorId: $authorId) {
                 id
@@ -243,19 +551,44 @@ class GraphQLClient:
             }
         }
         """
-        
-        response = requests.post(
+    
+    # Request bodies serialized once up to the variables value: b'{"query":"...","variables":'
+    _GET_USER_PREFIX = orjson.dumps({'query': GET_USER_QUERY, 'variables': None})[:-len(b'null}')]
+    _CREATE_POST_PREFIX = orjson.dumps({'query': CREATE_POST_MUTATION, 'variables': None})[:-len(b'null}')]
+    _JSON_HEADERS = {'Content-Type': 'application/json'}
+    
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+    
+    # GraphQL reports failures in the body with a 200, so those must not be cached either
+    @cached_http(cacheable=lambda result: not result.get('errors'))
+    def query_user(self, user_id: int) -> Dict:
+        """GraphQL query - should be logged"""
+        # SERVICE DEPENDENCY: GraphQL query
+        response = _CLIENT.post(
             self.endpoint,
-            json={
-                'query': mutation,
-                'variables': {
-                    'title': title,
-                    'content': content,
-                    'authorId': author_id
-                }
-            }
+            content=self._GET_USER_PREFIX + orjson.dumps({'userId': user_id}) + b'}',
+            headers=self._JSON_HEADERS
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    def create_post(self, title: str, content: str, author_id: int) -> Dict:
+        """GraphQL mutation - should be logged"""
+        # SERVICE DEPENDENCY: GraphQL mutation
+        variables = orjson.dumps({
+            'title': title,
+            'content': content,
+            'authorId': author_id
+        })
+        response = _CLIENT.post(
+            self.endpoint,
+            content=self._CREATE_POST_PREFIX + variables + b'}',
+            headers=self._JSON_HEADERS
         )
-        return response.json()
+        # The author's cached query_user result lists their posts
+        GraphQLClient.query_user.invalidate(self, author_id)
+        return orjson.loads(response.content)
 
 
 # ============================================================================
@@ -265,22 +598,54 @@ class GraphQLClient:
 class GRPCUserClient:
     """gRPC client for user service"""
     
+    # Connections multiplex many streams; a few channels per target bypass per-connection stream caps
+    POOL_SIZE = 4
+    _CHANNEL_OPTIONS = [
+        ('grpc.keepalive_time_ms', 30000),
+        ('grpc.keepalive_timeout_ms', 10000),
+        ('grpc.http2.max_pings_without_data', 0),
+        # Give each pooled channel its own connection instead of sharing subchannels
+        ('grpc.use_local_subchannel_pool', 1),
+        # Client-side load balancing across every address the DNS name resolves to
+        ('grpc.service_config', _dumps({'loadBalancingConfig': [{'round_robin': {}}]})),
+    ]
+    # target -> channels. grpc.aio channels are bound to the loop that created them, so they all
+    # live on the shared background loop and outlast any one caller's asyncio.run()
+    _channels: Dict[str, List[Any]] = {}
+    
     def __init__(self, host: str, port: int):
-        self.channel = grpc.insecure_channel(f'{host}:{port}')
+        self.target = f'dns:///{host}:{port}'
+        self._next_channel = itertools.count()
         # Note: In real code, would import generated stubs
     
-    def get_user_grpc(self, user_id: int) -> Dict:
+    def _channel(self):
+        """Shared channel for this target, created lazily; only call on the background loop"""
+        pool = self._channels.get(self.target)
+        if pool is None:
+            pool = self._channels[self.target] = [
+                grpc.aio.insecure_channel(self.target, options=self._CHANNEL_OPTIONS)
+                for _ in range(self.POOL_SIZE)
+            ]
+        return pool[next(self._next_channel) % len(pool)]
+    
+    async def get_user_grpc(self, user_id: int) -> Dict:
         """Get user via gRPC - should be logged"""
         # SERVICE DEPENDENCY: gRPC call
-        # In real code: stub = user_pb2_grpc.UserServiceStub(self.channel)
-        # request = user_pb2.GetUserRequest(user_id=user_id)
-        # response = stub.GetUser(request)
-        return {'id': user_id, 'name': 'John Doe'}
+        return await asyncio.wrap_future(_BACKGROUND.submit(lambda _session: self._get_user(user_id)))
+    
+    async def _get_user(self, user_id: int) -> Dict:
+        # In real code: stub = user_pb2_grpc.UserServiceStub(self._channel())
+        get_user = self._channel().unary_unary(
+            '/user.UserService/GetUser',
+            request_serializer=orjson.dumps,
+            response_deserializer=orjson.loads,
+        )
+        return await get_user({'user_id': user_id}, timeout=10)
     
     def stream_user_events(self, user_id: int):
         """Stream events via gRPC - should be logged"""
         # SERVICE DEPENDENCY: gRPC streaming
-        # In real code: stub = user_pb2_grpc.UserServiceStub(self.channel)
+        # In real code: stub = user_pb2_grpc.UserServiceStub(self._channel())
         # for event in stub.StreamEvents(request):
         #     yield event
         pass
@@ -291,23 +656,67 @@ class GRPCUserClient:
 # ============================================================================
 
 class WebSocketClient:
-    """WebSocket client for real-time updates"""
-    
-    async def connect_and_listen(self, ws_url: str):
+    """WebSocket client for real-time updates (use as `async with WebSocketClient(url) as client`)"""
+    
+    def __init__(self, ws_url: str):
+        self.ws_url = ws_url
+        self._ws = None
+        self._breaker = CircuitBreaker(failure_threshold=5, cooldown=60.0)
+    
+    async def __aenter__(self):
+        await self._connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+    
+    async def _connect(self):
+        """(Re)open the long-lived connection, backing off until the breaker trips"""
+        attempt = 0
+        while True:
+            self._breaker.check()
+            try:
+                self._ws = await websockets.connect(
+                    self.ws_url,
+                    ping_interval=20,
+                    ping_timeout=20,
+                    max_size=2**20
+                )
+            except (OSError, websockets.WebSocketException):
+                self._breaker.record_failure()
+                await asyncio.sleep(_backoff(attempt))
+                attempt += 1
+            else:
+                self._breaker.record_success()
+                return self._ws
+    
+    async def connect_and_listen(self):
         """Connect to WebSocket - should be logged"""
         # SERVICE DEPENDENCY: WebSocket connection
-        async with websockets.connect(ws_url) as websocket:
-            await websocket.send(json.dumps({'action': 'subscribe', 'channel': 'updates'}))
+        while True:
+            if self._ws is None:
+                await self._connect()
+            await self._ws.send(_dumps({'action': 'subscribe', 'channel': 'updates'}))
             
-            while True:
-                message = await websocket.recv()
-                print(f"Received: {message}")
-    
-    async def send_message(self, ws_url: str, message: Dict):
+            try:
+                while True:
+                    message = await self._ws.recv()
+                    print(f"Received: {message}")
+            except websockets.ConnectionClosed:
+                self._ws = None
+    
+    async def send_message(self, message: Dict):
         """Send WebSocket message - should be logged"""
         # SERVICE DEPENDENCY: WebSocket send
-        async with websockets.connect(ws_url) as websocket:
-            await websocket.send(json.dumps(message))
+        if self._ws is None:
+            await self._connect()
+        try:
+            await self._ws.send(_dumps(message))
+        except websockets.ConnectionClosed:
+            await self._connect()
+            await self._ws.send(_dumps(message))
 
 
 # ============================================================================
@@ -317,38 +726,95 @@ class WebSocketClient:
 class MessageQueueClient:
     """Message queue client (e.g., RabbitMQ, AWS SQS)"""
     
+    _PUBLISH_URL = "http://rabbitmq.example.com/api/exchanges/%2F/amq.default/publish"
+    
     def publish_message(self, queue_name: str, message: Dict) -> bool:
         """Publish to queue - should be logged"""
         # SERVICE DEPENDENCY: Message queue publish
-        response = requests.post(
-            f"http://rabbitmq.example.com/api/exchanges/%2F/amq.default/publish",
+        return self._publish(queue_name, message)
+    
+    def publish_batch(self, messages: List[Tuple[str, Dict]]) -> List[bool]:
+        """Publish many (queue_name, message) pairs; one result per message - should be logged"""
+        # SERVICE DEPENDENCY: Message queue batch publish
+        # The management API has no batch publish, so the batch goes out concurrently over the keep-alive pool
+        return list(_PUBLISH_POOL.map(lambda item: self._publish(*item), messages))
+    
+    def _publish(self, queue_name: str, message: Dict) -> bool:
+        response = _CLIENT.post(
+            self._PUBLISH_URL,
             json={
                 'routing_key': queue_name,
-                'payload': json.dumps(message),
+                'payload': _dumps(message),
                 'properties': {}
             }
         )
         return response.status_code == 200
     
-    def consume_messages(self, queue_name: str) -> List[Dict]:
+    def consume_messages(self, queue_name: str) -> Iterator[Dict]:
         """Consume from queue - should be logged"""
         # SERVICE DEPENDENCY: Message queue consume
-        response = requests.get(
+        # The management API's get is a POST; httpx doesn't send bodies on GET
+        with _CLIENT.stream(
+            "POST",
             f"http://rabbitmq.example.com/api/queues/%2F/{queue_name}/get",
             json={'count': 10, 'ackmode': 'ack_requeue_false'}
-        )
-        return response.json()
+        ) as response:
+            # Decode the array incrementally so messages reach the caller as their bytes arrive
+            messages = ijson.sendable_list()
+            parser = ijson.items_coro(messages, 'item', use_float=True)
+            for chunk in response.iter_bytes():
+                parser.send(chunk)
+                yield from messages
+                del messages[:]
+            parser.close()
+            yield from messages
 
 
 class KafkaProducer:
     """Kafka producer client"""
     
-    def send_event(self, topic: str, event: Dict) -> bool:
+    def __init__(self, bootstrap_servers: str = 'localhost:9092'):
+        self.bootstrap_servers = bootstrap_servers
+        self._producer = None
+        self._producer_lock = threading.Lock()
+    
+    def _get_producer(self):
+        """Connect on first use rather than in the constructor"""
+        if self._producer is None:
+            with self._producer_lock:
+                if self._producer is None:
+                    # The client batches per partition: linger up to 20 ms or 64 KiB, lz4-compressed
+                    self._producer = kafka.KafkaProducer(
+                        bootstrap_servers=self.bootstrap_servers,
+                        value_serializer=orjson.dumps,
+                        linger_ms=20,
+                        batch_size=65536,
+                        compression_type='lz4',
+                        acks=1
+                    )
+        return self._producer
+    
+    @staticmethod
+    def _on_send_error(topic: str, exc: Exception):
+        # Runs on the producer's I/O thread
+        logger.error("Kafka send to %s failed: %s", topic, exc)
+    
+    def send_event(self, topic: str, event: Dict) -> "kafka.producer.future.FutureRecordMetadata":
         """Send event to Kafka - should be logged"""
         # SERVICE DEPENDENCY: Kafka publish
-        # In real code: from kafka import KafkaProducer
-        # producer.send(topic, value=json.dumps(event).encode('utf-8'))
-        return True
+        # Non-blocking: the record joins the producer's in-flight batch. The returned
+        # future resolves to this record's metadata or raises this record's error
+        future = self._get_producer().send(topic, value=event)
+        future.add_errback(functools.partial(self._on_send_error, topic))
+        return future
+    
+    def close(self):
+        """Flush outstanding records and disconnect"""
+        with self._producer_lock:
+            producer, self._producer = self._producer, None
+        if producer is not None:
+            producer.flush()
+            producer.close()
 
 
 # ============================================================================
@@ -358,49 +824,57 @@ class KafkaProducer:
 class AWSServices:
     """AWS service integrations"""
     
-    def upload_to_s3(self, bucket: str, key: str, data: bytes) -> bool:
+    _S3_HEADERS = {'Content-Type': 'application/octet-stream'}
+    _SNS_URL = "https://sns.us-east-1.amazonaws.com/"
+    _LAMBDA_URL_TPL = "https://lambda.us-east-1.amazonaws.com/2015-03-31/functions/%s/invocations"
+    
+    def upload_to_s3(self, bucket: str, key: str, data: Union[bytes, BinaryIO]) -> bool:
         """Upload to S3 - should be logged"""
         # SERVICE DEPENDENCY: AWS S3 API
-        response = requests.put(
+        body, length_headers = _upload_body(data)
+        response = _CLIENT.put(
             f"https://{bucket}.s3.amazonaws.com/{key}",
-            data=data,
-            headers={'Content-Type': 'application/octet-stream'}
+            content=body,
+            headers={**self._S3_HEADERS, **length_headers}
         )
         return response.status_code == 200
     
     def send_sns_notification(self, topic_arn: str, message: str) -> Dict:
         """Send SNS notification - should be logged"""
         # SERVICE DEPENDENCY: AWS SNS API
-        response = requests.post(
-            "https://sns.us-east-1.amazonaws.com/",
+        response = _CLIENT.post(
+            self._SNS_URL,
             data={
                 'Action': 'Publish',
                 'TopicArn': topic_arn,
                 'Message': message
             }
         )
-        return response.json()
+        return orjson.loads(response.content)
     
     def invoke_lambda(self, function_name: str, payload: Dict) -> Dict:
         """Invoke Lambda function - should be logged"""
         # SERVICE DEPENDENCY: AWS Lambda API
-        response = requests.post(
-            f"https://lambda.us-east-1.amazonaws.com/2015-03-31/functions/{function_name}/invocations",
+        response = _CLIENT.post(
+            self._LAMBDA_URL_TPL % function_name,
             json=payload
         )
-        return response.json()
+        return orjson.loads(response.content)
 
 
 class AzureServices:
     """Azure service integrations"""
     
-    def store_blob(self, container: str, blob_name: str, data: bytes) -> bool:
+    _BLOB_HEADERS = {'x-ms-blob-type': 'BlockBlob'}
+    
+    def store_blob(self, container: str, blob_name: str, data: Union[bytes, BinaryIO]) -> bool:
         """Store blob in Azure - should be logged"""
         # SERVICE DEPENDENCY: Azure Blob Storage
-        response = requests.put(
+        body, length_headers = _upload_body(data)
+        response = _CLIENT.put(
             f"https://storageaccount.blob.core.windows.net/{container}/{blob_name}",
-            data=data,
-            headers={'x-ms-blob-type': 'BlockBlob'}
+            content=body,
+            headers={**self._BLOB_HEADERS, **length_headers}
         )
         return response.status_code == 201
 
@@ -414,39 +888,49 @@ class FirebaseClient:
     
     def __init__(self, project_id: str):
         self.base_url = f"https://{project_id}.firebaseio.com"
+        self._path_url_tpl = self.base_url + "/%s.json"
     
     def write_data(self, path: str, data: Dict) -> Dict:
         """Write to Firebase - should be logged"""
         # SERVICE DEPENDENCY: Firebase API
-        response = requests.put(
-            f"{self.base_url}/{path}.json",
+        response = _CLIENT.put(
+            self._path_url_tpl % path,
             json=data
         )
-        return response.json()
+        # Paths are hierarchical - a write changes cached reads above and below it, so drop them all
+        FirebaseClient.read_data.cache_clear(self)
+        return orjson.loads(response.content)
     
+    @cached_http()
     def read_data(self, path: str) -> Dict:
         """Read from Firebase - should be logged"""
         # SERVICE DEPENDENCY: Firebase API
-        response = requests.get(f"{self.base_url}/{path}.json")
-        return response.json()
+        response = _CLIENT.get(self._path_url_tpl % path)
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
 
 class MongoDBAtlasClient:
     """MongoDB Atlas Data API client"""
     
+    _HEADERS = {'api-key': 'your-api-key'}
+    _FIND_URL = "https://data.mongodb-api.com/app/data-abc/endpoint/data/v1/action/find"
+    
+    @cached_http()
     def find_documents(self, collection: str, filter_query: Dict) -> List[Dict]:
         """Find documents via Atlas API - should be logged"""
         # SERVICE DEPENDENCY: MongoDB Atlas Data API
-        response = requests.post(
-            "https://data.mongodb-api.com/app/data-abc/endpoint/data/v1/action/find",
+        response = _CLIENT.post(
+            self._FIND_URL,
             json={
                 'collection': collection,
                 'database': 'mydb',
                 'filter': filter_query
             },
-            headers={'api-key': 'your-api-key'}
+            headers=self._HEADERS
         )
-        return response.json().get('documents', [])
+        response.raise_for_status()
+        return orjson.loads(response.content).get('documents', [])
 
 
 # ============================================================================
@@ -475,25 +959,39 @@ class OrderService:
         )
         
         if payment_result.get('status') == 'succeeded':
+            # Email and SMS are independent of each other - send them concurrently on the shared
+            # loop and session; fire-and-forget, failures are logged by _send_confirmations
+            _BACKGROUND.submit(lambda session: self._send_confirmations(session, user, total))
+        
+        return {
+            'order_id': '12345',
+            'status': 'confirmed',
+            'user': user,
+            'payment': payment_result
+        }
+    
+    async def _send_confirmations(self, session: aiohttp.ClientSession, user: Dict, total: float):
+        """Send order confirmation email and SMS concurrently; best-effort, the card is already charged"""
+        results = await asyncio.gather(
             # SERVICE DEPENDENCY 3: Send confirmation email
             self.email_service.send_email(
+                session,
                 to=user.get('email'),
                 subject='Order Confirmation',
                 body=f'Your order has been confirmed. Total: ${total}'
-            )
-            
+            ),
             # SERVICE DEPENDENCY 4: Send SMS notification
             self.sms_service.send_sms(
+                session,
                 phone=user.get('phone'),
                 message=f'Order confirmed! Total: ${total}'
-            )
-        
-        return {
-            'order_id': '12345',
-            'status': 'confirmed',
-            'user': user,
-            'payment': payment_result
-        }
+            ),
+            return_exceptions=True
+        )
+        # An open breaker or a provider error must not fail an order that has been paid for
+        for channel, result in zip(('email', 'sms'), results):
+            if isinstance(result, Exception):
+                logger.warning("Order confirmation %s failed for user %s: %s", channel, user.get('id'), result)
 
 
 if __name__ == "__main__":
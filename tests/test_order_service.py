@@ -0,0 +1,40 @@
+"""
+Unit tests for order_service helpers that don't need a live database
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("asyncpg")
+
+from order_service import INVENTORY_BULK_UPDATE, net_inventory_deltas, update_inventory
+
+
+class RecordingDB:
+    """Stands in for the pool/connection and records executed statements"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def execute(self, query, *args):
+        self.calls.append((query, args))
+
+
+def test_net_inventory_deltas_sums_repeated_products():
+    product_ids, quantities = net_inventory_deltas([("sku-1", -2), ("sku-2", -1), ("sku-1", -3)])
+    assert dict(zip(product_ids, quantities)) == {"sku-1": -5, "sku-2": -1}
+    assert len(product_ids) == len(set(product_ids))
+
+
+def test_update_inventory_sends_one_row_per_product():
+    db = RecordingDB()
+    asyncio.run(update_inventory(db, [("sku-1", -2), ("sku-1", -3)]))
+    assert db.calls == [(INVENTORY_BULK_UPDATE, (["sku-1"], [-5]))]
+
+
+def test_update_inventory_skips_empty_orders():
+    db = RecordingDB()
+    asyncio.run(update_inventory(db, []))
+    assert db.calls == []
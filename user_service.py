@@ -3,14 +3,63 @@ User Service - Flask Application
 Handles user authentication and profile management
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
+import atexit
+import base64
+import hashlib
+import hmac
 import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+import xxhash
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 
 app = Flask(__name__)
 
 # Some logging configured
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+
+
+def configure_logging(level=logging.INFO):
+    """Request threads only enqueue records; a listener thread formats and writes them"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+
+
+configure_logging()
+
+_SHA256 = hashlib.sha256
+
+# Token signing: the key schedule and the encoded header are computed once, each token only copies the HMAC state
+# Shared by every worker: a per-process key would make tokens invalid on other workers and after restarts
+AUTH_TOKEN_SECRET = os.getenv("AUTH_TOKEN_SECRET", "").encode()
+if not AUTH_TOKEN_SECRET:
+    raise RuntimeError("AUTH_TOKEN_SECRET must be set to sign auth tokens")
+_HMAC_KEY = hmac.new(AUTH_TOKEN_SECRET, None, _SHA256)
+_TOKEN_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+
+# Read-through cache for user rows; writes evict their entry, the TTL bounds staleness across workers
+_USER_CACHE = TTLCache(maxsize=10_000, ttl=60)
+_USER_CACHE_LOCK = threading.Lock()
+
+
+def ojson(obj, status=200):
+    """JSON response serialized with orjson instead of Flask's stdlib-backed jsonify"""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
 
 
 @app.route('/api/users/register', methods=['POST'])
@@ -26,18 +75,19 @@ def register_user():
         
         # Validation
         if not username or not email or not password:
-            logger.warning(f"Invalid registration data for email: {email}")
-            return jsonify({"error": "Missing required fields"}), 400
+            logger.warning("Invalid registration data for email: %s", email)
+            return ojson({"error": "Missing required fields"}, 400)
         
         # Database operation (simulated)
         user_id = create_user_in_db(username, email, password)
         
-        logger.info(f"User registered successfully: {user_id}")
-        return jsonify({"user_id": user_id, "message": "User registered"}), 201
+        logger.info("User registered successfully: %s", user_id)
+        return ojson({"user_id": user_id, "message": "User registered"}, 201)
         
     except Exception as e:
-        logger.error(f"Error during user registration: {str(e)}", exc_info=True)
-        return jsonify({"error": "Internal server error"}), 500
+        # Tracebacks are only captured when debugging - formatting one per failed request is costly under load
+        logger.error("Error during user registration: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        return ojson({"error": "Internal server error"}, 500)
 
 
 @app.route('/api/users/<user_id>', methods=['GET'])
@@ -47,11 +97,11 @@ def get_user(user_id):
     try:
         user = fetch_user_from_db(user_id)
         if not user:
-            return jsonify({"error": "User not found"}), 404
-        return jsonify(user), 200
+            return ojson({"error": "User not found"}, 404)
+        return ojson(user, 200)
     except Exception as e:
         # NO ERROR LOGGING - GAP!
-        return jsonify({"error": "Internal server error"}), 500
+        return ojson({"error": "Internal server error"}, 500)
 
 
 @app.route('/api/users/<user_id>', methods=['PUT'])
@@ -64,16 +114,16 @@ def update_user(user_id):
         user = fetch_user_from_db(user_id)
         if not user:
             logger.warning(f"Attempted to update non-existent user: {user_id}")
-            return jsonify({"error": "User not found"}), 404
+            return ojson({"error": "User not found"}, 404)
         
         # Update user (no logging of what changed - GAP!)
         updated_user = update_user_in_db(user_id, data)
         
-        return jsonify(updated_user), 200
+        return ojson(updated_user, 200)
     except Exception as e:
         # Has error logging
         logger.error(f"Failed to update user {user_id}: {str(e)}")
-        return jsonify({"error": "Update failed"}), 500
+        return ojson({"error": "Update failed"}, 500)
 
 
 @app.route('/api/users/<user_id>', methods=['DELETE'])
@@ -83,26 +133,33 @@ def delete_user(user_id):
     try:
         result = delete_user_from_db(user_id)
         if result:
-            return jsonify({"message": "User deleted"}), 200
-        return jsonify({"error": "User not found"}), 404
+            return ojson({"message": "User deleted"}, 200)
+        return ojson({"error": "User not found"}, 404)
     except Exception as e:
-        return jsonify({"error": "Deletion failed"}), 500
+        return ojson({"error": "Deletion failed"}, 500)
 
 
 def create_user_in_db(username, email, password):
     """Database operation - MISSING LOGGING"""
     # Database query with no logging - GAP!
-    import hashlib
-    hashed_password = hashlib.sha256(password.encode()).hexdigest()
+    # Raw digest, stored as-is (bytea) - the same format authenticate_user compares against
+    hashed_password = _SHA256(password.encode('utf-8', 'strict')).digest()
     
     # Simulated DB insert
-    user_id = f"user_{hash(email)}"
+    # xxh64 is stable across processes, unlike the per-process salted hash()
+    user_id = f"user_{xxhash.xxh64_intdigest(email):016x}"
     return user_id
 
 
 def fetch_user_from_db(user_id):
     """Fetch user from database - NO LOGGING"""
     # Database read with no logging - GAP!
+    # Copy so callers can't mutate the cached row for everyone else
+    return dict(_load_user(user_id))
+
+
+@cached(_USER_CACHE, lock=_USER_CACHE_LOCK)
+def _load_user(user_id):
     return {
         "id": user_id,
         "username": "john_doe",
@@ -113,13 +170,23 @@ def fetch_user_from_db(user_id):
 def update_user_in_db(user_id, data):
     """Update user in database - NO LOGGING"""
     # Database update with no logging - GAP!
-    return {"id": user_id, **data}
+    user = {"id": user_id, **data}
+    # Evict after the write so a concurrent read can't re-cache the old row
+    _evict_user(user_id)
+    return user
 
 
 def delete_user_from_db(user_id):
     """Delete user from database - CRITICAL MISSING LOGGING"""
     # CRITICAL: Deleting data with no audit trail - MAJOR GAP!
-    return True
+    deleted = True
+    _evict_user(user_id)
+    return deleted
+
+
+def _evict_user(user_id):
+    with _USER_CACHE_LOCK:
+        _USER_CACHE.pop(hashkey(user_id), None)
 
 
 @app.route('/api/users/login', methods=['POST'])
@@ -138,30 +205,45 @@ def login():
             # Success logging
             logger.info(f"Successful login for user: {user['id']}")
             token = generate_auth_token(user['id'])
-            return jsonify({"token": token}), 200
+            return ojson({"token": token}, 200)
         else:
             # Failed login has logging
             logger.warning(f"Failed login attempt for email: {email}")
-            return jsonify({"error": "Invalid credentials"}), 401
+            return ojson({"error": "Invalid credentials"}, 401)
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
-        return jsonify({"error": "Login failed"}), 500
+        return ojson({"error": "Login failed"}, 500)
 
 
 def authenticate_user(email, password):
     """Authenticate user - NO LOGGING"""
     # Authentication logic with no logging - GAP!
-    import hashlib
-    hashed = hashlib.sha256(password.encode()).hexdigest()
-    # Simulated check
+    hashed = _SHA256(password.encode('utf-8', 'strict')).digest()
+    # Simulated check; constant-time compare so response timing doesn't leak the match length.
+    # Unknown emails (no stored hash) are rejected like a wrong password
+    stored = fetch_password_hash_from_db(email)
+    if stored is None or not hmac.compare_digest(hashed, stored):
+        return None
     return {"id": "user_123", "email": email}
 
 
+def fetch_password_hash_from_db(email):
+    """Fetch stored password digest as raw bytes - NO LOGGING"""
+    # Database read with no logging - GAP!
+    return None
+
+
 def generate_auth_token(user_id):
     """Generate JWT token - NO LOGGING"""
     # Token generation with no logging - SECURITY GAP!
-    import time
-    return f"token_{user_id}_{int(time.time())}"
+    payload = base64.urlsafe_b64encode(
+        orjson.dumps({"sub": user_id, "iat": int(time.time())})
+    ).rstrip(b"=")
+    signing_input = _TOKEN_HEADER + b"." + payload
+    h = _HMAC_KEY.copy()
+    h.update(signing_input)
+    signature = base64.urlsafe_b64encode(h.digest()).rstrip(b"=")
+    return (signing_input + b"." + signature).decode()
 
 
 if __name__ == '__main__':